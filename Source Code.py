@@ -1,11 +1,373 @@
-import copy
+import array
 import math
+import random
+import time
+from multiprocessing import Pool, cpu_count
 from typing import List, Tuple, Optional
 
+# Bitboard layout: bit (row * 8 + col) is set when that square is occupied,
+# so a8 is bit 0 and h1 is bit 63 (matching the (row, col) board indices).
+PIECES = 'PNBRQKpnbrqk'
+PIECE_IDX = {piece: i for i, piece in enumerate(PIECES)}
+
+# Signed mailbox codes: white pieces are positive and black negative, so the
+# sign gives a piece's color (piece > 0) and abs(piece) its kind (WP..WK).
+EMPTY = 0
+WP, WN, WB, WR, WQ, WK = range(1, 7)
+BP, BN, BB, BR, BQ, BK = range(-1, -7, -1)
+# Indexed by code; negative codes count back from the end
+PIECE_SYMBOLS = '.PNBRQKkqrbnp'
+PIECE_CODE = {PIECE_SYMBOLS[code]: code for code in range(-6, 7)}
+BB_INDEX = [PIECE_IDX.get(symbol, -1) for symbol in PIECE_SYMBOLS]
+
+# Ray directions as (row step, col step); the first four step towards higher
+# square indices, so their nearest blocker is the lowest set bit.
+DIRECTIONS = [(1, 0), (0, 1), (1, -1), (1, 1), (-1, 0), (0, -1), (-1, -1), (-1, 1)]
+POSITIVE_DIRECTIONS = (0, 1, 2, 3)
+ROOK_DIRECTIONS = (0, 1, 4, 5)
+BISHOP_DIRECTIONS = (2, 3, 6, 7)
+
+def _build_rays() -> List[List[int]]:
+    """Precompute the empty-board ray mask for every square and direction"""
+    rays = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        sq_rays = []
+        for dr, dc in DIRECTIONS:
+            mask = 0
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+                r += dr
+                c += dc
+            sq_rays.append(mask)
+        rays.append(sq_rays)
+    return rays
+
+RAY = _build_rays()
+
+def _build_step_attacks(steps: List[Tuple[int, int]]) -> List[int]:
+    """Precompute the attack bitboard of a non-sliding piece on every square"""
+    attacks = [0] * 64
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        for dr, dc in steps:
+            if 0 <= row + dr < 8 and 0 <= col + dc < 8:
+                attacks[sq] |= 1 << ((row + dr) * 8 + col + dc)
+    return attacks
+
+# Pawn attacks per color; white pawns move towards row 0
+WHITE, BLACK = 0, 1
+PAWN_ATTACKS = [
+    _build_step_attacks([(-1, -1), (-1, 1)]),
+    _build_step_attacks([(1, -1), (1, 1)]),
+]
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_3 = 0xFF << 40
+RANK_6 = 0xFF << 16
+
+KNIGHT_ATTACKS = _build_step_attacks([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _build_step_attacks([(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc])
+
+def ray_attacks(sq: int, direction: int, occupied: int) -> int:
+    """Squares attacked along one ray, up to and including the first blocker"""
+    ray = RAY[sq][direction]
+    blockers = ray & occupied
+    if blockers:
+        if direction in POSITIVE_DIRECTIONS:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        ray ^= RAY[blocker][direction]
+    return ray
+
+MASK64 = (1 << 64) - 1
+
+# Magic multipliers for sliding-piece attack lookup. Each one maps every
+# occupancy subset of its square's relevant mask to a table slot without
+# destructive collisions. They were found once with the usual sparse random
+# trial search, which is far too slow to repeat at import time.
+ROOK_MAGIC = [
+    0x2080001440022581, 0x1080200040001080, 0x4080100008200080, 0x0280080080100254,
+    0x4D8004000A180080, 0x0100080400020100, 0x1080010040800200, 0x0200004402002081,
+    0x0068800024884004, 0x1000804000802002, 0x000200208A001040, 0x3008801000800800,
+    0x2006001060440A00, 0x1000800200800400, 0x0004000441024810, 0xA001000082004100,
+    0x0040808000204014, 0x0000424002201000, 0x0010110041002000, 0x0000090021041000,
+    0x0204008004800800, 0x0000808004000200, 0x6006040021485042, 0x0000020002409924,
+    0x2000401980028020, 0x4000400100308100, 0x0000820200201041, 0xB100100080800800,
+    0x3004080080040080, 0x0802000200041009, 0x01A0580400021110, 0x00020042000408A1,
+    0x4218884000800023, 0x0480201000400045, 0x0010200080801000, 0x1200200901001000,
+    0x0000100801000500, 0x0080020080800400, 0x004A000100404080, 0x0480005402001081,
+    0x258000402000C000, 0xA010004820084002, 0x0480200010008080, 0x244100100021000C,
+    0x2040080005010010, 0x0012000810020004, 0x0011000200B9000C, 0x1121000080410002,
+    0x00082080410A0600, 0x4002008100402600, 0x0A0300E008544100, 0x7B00080010008080,
+    0x0300080100100500, 0x0002020080040080, 0x0042521810214400, 0x8A00004089140200,
+    0x00001280010A2041, 0x0400401102042086, 0x41902000100C4101, 0x0043020420900009,
+    0x00E2000410082002, 0x4402000108041002, 0x2100101A00814804, 0x0400010400218246,
+]
+BISHOP_MAGIC = [
+    0x0102040418220020, 0x0108024802002028, 0x8010044040400001, 0x0022209200044800,
+    0x4004504005040114, 0x0022010420A80800, 0x0008441008090002, 0x0000420801480200,
+    0x1100220244011C00, 0x00883004081AB020, 0x4400100152002000, 0x4019080841004000,
+    0x2861021210000000, 0x400EA10108400020, 0x4800208208A24000, 0x0020A500A0842085,
+    0x3410000802504400, 0x0010E0200C010060, 0x0014182042408200, 0x4094006840112109,
+    0x2014200202010000, 0x000100020080C400, 0x800400420D2C0200, 0x0002200182251000,
+    0x0010F10304C41000, 0x001024A008281084, 0x0088110002040100, 0x0820080001004008,
+    0x0104040020410050, 0x0110002027040500, 0x418C008009182100, 0x2C00A9040C80480B,
+    0x008110C8005020A4, 0x4004210802041000, 0x0004020108208100, 0x0000080800120A00,
+    0x430C008400820102, 0x1400808100020108, 0x005006020010A8A0, 0x000801868004A220,
+    0x00420105C00C2000, 0x1010921032019040, 0x0300222028103000, 0x0008004208001080,
+    0x5410202248811400, 0x0008010800800808, 0x3C02C20404000900, 0x0408022282040032,
+    0x0000941002100000, 0x0112209A10100804, 0x080C020111210000, 0x442002A442022008,
+    0x00084A181B040000, 0x00115021021C2080, 0x4010051000A20000, 0x0404688085060000,
+    0x0000220110011000, 0x140000220734200C, 0x0440010424020800, 0x2204828883460800,
+    0x0020000004050410, 0x4060004A20082080, 0x00489034B002C201, 0x0444049010410300,
+]
+
+def _relevant_mask(sq: int, directions: Tuple[int, ...]) -> int:
+    """Ray squares whose occupancy can change the attack set (edges excluded)"""
+    row, col = divmod(sq, 8)
+    mask = 0
+    for direction in directions:
+        dr, dc = DIRECTIONS[direction]
+        r, c = row + dr, col + dc
+        while 0 <= r + dr < 8 and 0 <= c + dc < 8:
+            mask |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+    return mask
+
+def _build_magic_tables(directions: Tuple[int, ...], magics: List[int]) -> Tuple[List[int], List[int], List[List[int]]]:
+    """Fill the attack table of every square by tracing each occupancy subset once"""
+    masks, shifts, tables = [], [], []
+    for sq in range(64):
+        mask = _relevant_mask(sq, directions)
+        shift = 64 - mask.bit_count()
+        table = [0] * (1 << (64 - shift))
+        subset = 0
+        while True:
+            attacks = 0
+            for direction in directions:
+                attacks |= ray_attacks(sq, direction, subset)
+            table[((subset * magics[sq]) & MASK64) >> shift] = attacks
+            # Carry-rippler: step to the next subset of mask
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        shifts.append(shift)
+        tables.append(table)
+    return masks, shifts, tables
+
+BISHOP_MASK, BISHOP_SHIFT, BISHOP_ATTACK = _build_magic_tables(BISHOP_DIRECTIONS, BISHOP_MAGIC)
+ROOK_MASK, ROOK_SHIFT, ROOK_ATTACK = _build_magic_tables(ROOK_DIRECTIONS, ROOK_MAGIC)
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """Diagonal attack set of a bishop on sq via magic lookup"""
+    return BISHOP_ATTACK[sq][(((occupied & BISHOP_MASK[sq]) * BISHOP_MAGIC[sq]) & MASK64) >> BISHOP_SHIFT[sq]]
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """Rank and file attack set of a rook on sq via magic lookup"""
+    return ROOK_ATTACK[sq][(((occupied & ROOK_MASK[sq]) * ROOK_MAGIC[sq]) & MASK64) >> ROOK_SHIFT[sq]]
+
+# Castling rights bits, and the rights that survive a move from or to each square
+WK_MASK, WQ_MASK, BK_MASK, BQ_MASK = 1, 2, 4, 8
+CASTLE_RIGHTS = [0xF] * 64
+CASTLE_RIGHTS[0] &= ~BQ_MASK
+CASTLE_RIGHTS[4] &= ~(BK_MASK | BQ_MASK)
+CASTLE_RIGHTS[7] &= ~BK_MASK
+CASTLE_RIGHTS[56] &= ~WQ_MASK
+CASTLE_RIGHTS[60] &= ~(WK_MASK | WQ_MASK)
+CASTLE_RIGHTS[63] &= ~WK_MASK
+
+# Zobrist keys: a position's hash is the XOR of the keys of its pieces,
+# castling rights (as a 4-bit index), en passant file and side to move.
+# A fixed seed keeps hashes identical between runs.
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_PIECE = [[_zobrist_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+ZOBRIST_CASTLE = [_zobrist_rng.getrandbits(64) for _ in range(16)]
+ZOBRIST_EP = [_zobrist_rng.getrandbits(64) for _ in range(8)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Score of being checkmated at the root, in pawns; a mate found n plies
+# deep scores MATE_SCORE - n, so nearer mates are preferred. Anything beyond
+# MATE_BOUND is a mate score.
+MATE_SCORE = 10000
+MATE_BOUND = MATE_SCORE - 1000
+# Quiescence stops extending check evasions this many plies from the root
+MAX_PLY = 64
+
+# Move ordering keys: every capture sorts ahead of the killer moves
+CAPTURE_SCORE = 100000
+KILLER_SCORE = 50000
+
+# PeSTO piece-square tables (centipawns, white's view with a8 first), for the
+# middlegame and the endgame, indexed by piece kind WP..WK
+_MG_PESTO = {
+    WP: [
+          0,    0,    0,    0,    0,    0,    0,    0,
+         98,  134,   61,   95,   68,  126,   34,  -11,
+         -6,    7,   26,   31,   65,   56,   25,  -20,
+        -14,   13,    6,   21,   23,   12,   17,  -23,
+        -27,   -2,   -5,   12,   17,    6,   10,  -25,
+        -26,   -4,   -4,  -10,    3,    3,   33,  -12,
+        -35,   -1,  -20,  -23,  -15,   24,   38,  -22,
+          0,    0,    0,    0,    0,    0,    0,    0,
+    ],
+    WN: [
+       -167,  -89,  -34,  -49,   61,  -97,  -15, -107,
+        -73,  -41,   72,   36,   23,   62,    7,  -17,
+        -47,   60,   37,   65,   84,  129,   73,   44,
+         -9,   17,   19,   53,   37,   69,   18,   22,
+        -13,    4,   16,   13,   28,   19,   21,   -8,
+        -23,   -9,   12,   10,   19,   17,   25,  -16,
+        -29,  -53,  -12,   -3,   -1,   18,  -14,  -19,
+       -105,  -21,  -58,  -33,  -17,  -28,  -19,  -23,
+    ],
+    WB: [
+        -29,    4,  -82,  -37,  -25,  -42,    7,   -8,
+        -26,   16,  -18,  -13,   30,   59,   18,  -47,
+        -16,   37,   43,   40,   35,   50,   37,   -2,
+         -4,    5,   19,   50,   37,   37,    7,   -2,
+         -6,   13,   13,   26,   34,   12,   10,    4,
+          0,   15,   15,   15,   14,   27,   18,   10,
+          4,   15,   16,    0,    7,   21,   33,    1,
+        -33,   -3,  -14,  -21,  -13,  -12,  -39,  -21,
+    ],
+    WR: [
+         32,   42,   32,   51,   63,    9,   31,   43,
+         27,   32,   58,   62,   80,   67,   26,   44,
+         -5,   19,   26,   36,   17,   45,   61,   16,
+        -24,  -11,    7,   26,   24,   35,   -8,  -20,
+        -36,  -26,  -12,   -1,    9,   -7,    6,  -23,
+        -45,  -25,  -16,  -17,    3,    0,   -5,  -33,
+        -44,  -16,  -20,   -9,   -1,   11,   -6,  -71,
+        -19,  -13,    1,   17,   16,    7,  -37,  -26,
+    ],
+    WQ: [
+        -28,    0,   29,   12,   59,   44,   43,   45,
+        -24,  -39,   -5,    1,  -16,   57,   28,   54,
+        -13,  -17,    7,    8,   29,   56,   47,   57,
+        -27,  -27,  -16,  -16,   -1,   17,   -2,    1,
+         -9,  -26,   -9,  -10,   -2,   -4,    3,   -3,
+        -14,    2,  -11,   -2,   -5,    2,   14,    5,
+        -35,   -8,   11,    2,    8,   15,   -3,    1,
+         -1,  -18,   -9,   10,  -15,  -25,  -31,  -50,
+    ],
+    WK: [
+        -65,   23,   16,  -15,  -56,  -34,    2,   13,
+         29,   -1,  -20,   -7,   -8,   -4,  -38,  -29,
+         -9,   24,    2,  -16,  -20,    6,   22,  -22,
+        -17,  -20,  -12,  -27,  -30,  -25,  -14,  -36,
+        -49,   -1,  -27,  -39,  -46,  -44,  -33,  -51,
+        -14,  -14,  -22,  -46,  -44,  -30,  -15,  -27,
+          1,    7,   -8,  -64,  -43,  -16,    9,    8,
+        -15,   36,   12,  -54,    8,  -28,   24,   14,
+    ],
+}
+_EG_PESTO = {
+    WP: [
+          0,    0,    0,    0,    0,    0,    0,    0,
+        178,  173,  158,  134,  147,  132,  165,  187,
+         94,  100,   85,   67,   56,   53,   82,   84,
+         32,   24,   13,    5,   -2,    4,   17,   17,
+         13,    9,   -3,   -7,   -7,   -8,    3,   -1,
+          4,    7,   -6,    1,    0,   -5,   -1,   -8,
+         13,    8,    8,   10,   13,    0,    2,   -7,
+          0,    0,    0,    0,    0,    0,    0,    0,
+    ],
+    WN: [
+        -58,  -38,  -13,  -28,  -31,  -27,  -63,  -99,
+        -25,   -8,  -25,   -2,   -9,  -25,  -24,  -52,
+        -24,  -20,   10,    9,   -1,   -9,  -19,  -41,
+        -17,    3,   22,   22,   22,   11,    8,  -18,
+        -18,   -6,   16,   25,   16,   17,    4,  -18,
+        -23,   -3,   -1,   15,   10,   -3,  -20,  -22,
+        -42,  -20,  -10,   -5,   -2,  -20,  -23,  -44,
+        -29,  -51,  -23,  -15,  -22,  -18,  -50,  -64,
+    ],
+    WB: [
+        -14,  -21,  -11,   -8,   -7,   -9,  -17,  -24,
+         -8,   -4,    7,  -12,   -3,  -13,   -4,  -14,
+          2,   -8,    0,   -1,   -2,    6,    0,    4,
+         -3,    9,   12,    9,   14,   10,    3,    2,
+         -6,    3,   13,   19,    7,   10,   -3,   -9,
+        -12,   -3,    8,   10,   13,    3,   -7,  -15,
+        -14,  -18,   -7,   -1,    4,   -9,  -15,  -27,
+        -23,   -9,  -23,   -5,   -9,  -16,   -5,  -17,
+    ],
+    WR: [
+         13,   10,   18,   15,   12,   12,    8,    5,
+         11,   13,   13,   11,   -3,    3,    8,    3,
+          7,    7,    7,    5,    4,   -3,   -5,   -3,
+          4,    3,   13,    1,    2,    1,   -1,    2,
+          3,    5,    8,    4,   -5,   -6,   -8,  -11,
+         -4,    0,   -5,   -1,   -7,  -12,   -8,  -16,
+         -6,   -6,    0,    2,   -9,   -9,  -11,   -3,
+         -9,    2,    3,   -1,   -5,  -13,    4,  -20,
+    ],
+    WQ: [
+         -9,   22,   22,   27,   27,   19,   10,   20,
+        -17,   20,   32,   41,   58,   25,   30,    0,
+        -20,    6,    9,   49,   47,   35,   19,    9,
+          3,   22,   24,   45,   57,   40,   57,   36,
+        -18,   28,   19,   47,   31,   34,   39,   23,
+        -16,  -27,   15,    6,    9,   17,   10,    5,
+        -22,  -23,  -30,  -16,  -16,  -23,  -36,  -32,
+        -33,  -28,  -22,  -43,   -5,  -32,  -20,  -41,
+    ],
+    WK: [
+        -74,  -35,  -18,  -18,  -11,   15,    4,  -17,
+        -12,   17,   14,   17,   17,   38,   23,   11,
+         10,   17,   23,   15,   20,   45,   44,   13,
+         -8,   22,   24,   27,   26,   33,   26,    3,
+        -18,   -4,   21,   24,   27,   23,    9,  -11,
+        -19,   -3,   11,   21,   23,   16,    7,   -9,
+        -27,  -11,    4,   13,   14,    4,   -5,  -17,
+        -53,  -34,  -21,  -11,  -28,  -14,  -24,  -43,
+    ],
+}
+MG_VALUE = {WP: 82, WN: 337, WB: 365, WR: 477, WQ: 1025, WK: 0}
+EG_VALUE = {WP: 94, WN: 281, WB: 297, WR: 512, WQ: 936, WK: 0}
+
+def _build_pst(values: dict, tables: dict) -> List[List[int]]:
+    """Material plus placement score of every piece on every square, indexed
+    by PIECE_IDX; black entries are mirrored and negated, so white's score
+    is the plain sum over all pieces"""
+    pst = []
+    for symbol in PIECES:
+        code = PIECE_CODE[symbol]
+        kind = abs(code)
+        if code > 0:
+            pst.append([values[kind] + tables[kind][sq] for sq in range(64)])
+        else:
+            pst.append([-values[kind] - tables[kind][sq ^ 56] for sq in range(64)])
+    return pst
+
+MG_PST = _build_pst(MG_VALUE, _MG_PESTO)
+EG_PST = _build_pst(EG_VALUE, _EG_PESTO)
+# Game phase weight per piece kind; the starting position totals TOTAL_PHASE
+PHASE_WEIGHT = [0, 0, 1, 1, 2, 4, 0]
+TOTAL_PHASE = 24
+
+# Moves are packed ints: from square in bits 0-5, to square in bits 6-11 and
+# the promoted piece kind (WN..WQ, 0 for none) in bits 12-15
+MOVE_SQUARES = 0xFFF
+PROMOTION_KINDS = (WQ, WR, WB, WN)
+PROMOTION_RANKS = 0xFF | 0xFF << 56
+
+def pack_move(start: int, end: int, promotion: int = 0) -> int:
+    """Pack a move's from and to squares and promotion kind into one int"""
+    return start | end << 6 | promotion << 12
+
 class ChessBoard:
     def __init__(self):
         # Initialize 8x8 board with starting position
-        self.board = [
+        layout = [
             ['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r'],
             ['p', 'p', 'p', 'p', 'p', 'p', 'p', 'p'],
             ['.', '.', '.', '.', '.', '.', '.', '.'],
@@ -15,15 +377,37 @@ class ChessBoard:
             ['P', 'P', 'P', 'P', 'P', 'P', 'P', 'P'],
             ['R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R']
         ]
+        # One bitboard per piece type and color, indexed by PIECE_IDX.
+        # The mailbox of signed piece codes is kept in sync for lookups.
+        self.board = array.array('b', bytes(64))
+        self.bb = [0] * 12
+        self.occ_white = 0
+        self.occ_black = 0
+        self.occ_all = 0
+        self.zobrist_hash = 0
+        # Piece-square totals (white minus black) and game phase, updated
+        # as pieces are placed and removed
+        self.mg_score = 0
+        self.eg_score = 0
+        self.phase = 0
+        for i in range(8):
+            for j in range(8):
+                if layout[i][j] != '.':
+                    self._place_piece(i * 8 + j, PIECE_CODE[layout[i][j]])
         self.current_player = 'white'
+        # King squares, kept up to date so check tests need no board scan
+        self.king_sq = {'white': 60, 'black': 4}
+        # Last legal move list as (zobrist hash, moves); make/unmake change
+        # the hash, so a stale entry can never match
+        self._legal_cache = (None, [])
         self.move_history = []
         self.en_passant_target = None
-        self.castling_availability = {
-            'white_king': True, 'white_queen': True,
-            'black_king': True, 'black_queen': True
-        }
+        self.castle = WK_MASK | WQ_MASK | BK_MASK | BQ_MASK
         self.halfmove_clock = 0
         self.fullmove_number = 1
+        # Undo records pushed by make_move and popped by unmake_move
+        self.undo_stack = []
+        self.zobrist_hash ^= ZOBRIST_CASTLE[self.castle]
 
     def print_board(self):
         """Print the current state of the chessboard"""
@@ -31,61 +415,156 @@ class ChessBoard:
         for i in range(8):
             print(f'{8-i} ', end='')
             for j in range(8):
-                print(self.board[i][j], end=' ')
+                print(PIECE_SYMBOLS[self.get_piece(i * 8 + j)], end=' ')
             print(f'{8-i}')
         print('  a b c d e f g h\n')
 
-    def get_piece(self, pos: Tuple[int, int]) -> str:
-        """Get piece at given position"""
-        return self.board[pos[0]][pos[1]]
+    def to_fen(self) -> str:
+        """Describe the position as a FEN string"""
+        rows = []
+        for i in range(8):
+            row, empty = '', 0
+            for j in range(8):
+                piece = self.get_piece(i * 8 + j)
+                if piece == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += PIECE_SYMBOLS[piece]
+            rows.append(row + (str(empty) if empty else ''))
+        castling = ''.join(
+            flag for flag, mask in zip('KQkq', (WK_MASK, WQ_MASK, BK_MASK, BQ_MASK))
+            if self.castle & mask
+        ) or '-'
+        en_passant = pos_to_notation(self.en_passant_target) if self.en_passant_target else '-'
+        return (
+            f"{'/'.join(rows)} {self.current_player[0]} {castling} {en_passant} "
+            f"{self.halfmove_clock} {self.fullmove_number}"
+        )
 
-    def move_piece(self, start: Tuple[int, int], end: Tuple[int, int], promotion: str = None):
-        """Move piece from start to end position, handle castling and promotion"""
-        piece = self.get_piece(start)
-        self.board[end[0]][end[1]] = piece if not promotion else promotion
-        self.board[start[0]][start[1]] = '.'
+    @classmethod
+    def from_fen(cls, fen: str) -> 'ChessBoard':
+        """Build a board from a FEN string; missing move counters default to 0 and 1"""
+        placement, side, castling, en_passant, *counters = fen.split()
+        board = cls()
+        for sq in range(64):
+            board._clear_square(sq)
+        for i, rank in enumerate(placement.split('/')):
+            j = 0
+            for symbol in rank:
+                if symbol.isdigit():
+                    j += int(symbol)
+                    continue
+                piece = PIECE_CODE[symbol]
+                board._place_piece(i * 8 + j, piece)
+                if abs(piece) == WK:
+                    board.king_sq['white' if piece > 0 else 'black'] = i * 8 + j
+                j += 1
         
-        # Update castling availability
-        if piece.lower() == 'k':
-            self.castling_availability[f'{self.current_player}_king'] = False
-            self.castling_availability[f'{self.current_player}_queen'] = False
-        elif piece.lower() == 'r':
-            if start == (7, 0) and self.current_player == 'white':
-                self.castling_availability['white_queen'] = False
-            elif start == (7, 7) and self.current_player == 'white':
-                self.castling_availability['white_king'] = False
-            elif start == (0, 0) and self.current_player == 'black':
-                self.castling_availability['black_queen'] = False
-            elif start == (0, 7) and self.current_player == 'black':
-                self.castling_availability['black_king'] = False
+        castle = 0
+        for flag, mask in zip('KQkq', (WK_MASK, WQ_MASK, BK_MASK, BQ_MASK)):
+            if flag in castling:
+                castle |= mask
+        board.zobrist_hash ^= ZOBRIST_CASTLE[board.castle] ^ ZOBRIST_CASTLE[castle]
+        board.castle = castle
+        if en_passant != '-':
+            board.en_passant_target = notation_to_pos(en_passant)
+            board.zobrist_hash ^= ZOBRIST_EP[board.en_passant_target & 7]
+        if side == 'b':
+            board.current_player = 'black'
+            board.zobrist_hash ^= ZOBRIST_SIDE
+        halfmove, fullmove = (counters + ['0', '1'][len(counters):])[:2]
+        board.halfmove_clock = int(halfmove)
+        board.fullmove_number = int(fullmove)
+        return board
+
+    def get_piece(self, sq: int) -> int:
+        """Get the piece code at given square"""
+        return self.board[sq]
+
+    def _toggle_piece(self, piece: int, sq: int):
+        """Flip a piece's bit on its own bitboard and the occupancy bitboards"""
+        mask = 1 << sq
+        idx = BB_INDEX[piece]
+        self.bb[idx] ^= mask
+        self.zobrist_hash ^= ZOBRIST_PIECE[idx][sq]
+        if piece > 0:
+            self.occ_white ^= mask
+        else:
+            self.occ_black ^= mask
+        self.occ_all ^= mask
+
+    def _clear_square(self, sq: int):
+        """Remove whatever piece stands on sq from the board and bitboards"""
+        piece = self.board[sq]
+        if piece:
+            self._toggle_piece(piece, sq)
+            self.board[sq] = EMPTY
+            idx = BB_INDEX[piece]
+            self.mg_score -= MG_PST[idx][sq]
+            self.eg_score -= EG_PST[idx][sq]
+            self.phase -= PHASE_WEIGHT[abs(piece)]
+
+    def _place_piece(self, sq: int, piece: int):
+        """Put piece on an empty square"""
+        self._toggle_piece(piece, sq)
+        self.board[sq] = piece
+        idx = BB_INDEX[piece]
+        self.mg_score += MG_PST[idx][sq]
+        self.eg_score += EG_PST[idx][sq]
+        self.phase += PHASE_WEIGHT[abs(piece)]
+
+    def move_piece(self, start: int, end: int, promotion: int = None):
+        """Move piece from start to end square, handle castling and promotion"""
+        piece = self.board[start]
+        captured = self.board[end]
+        if self.en_passant_target:
+            self.zobrist_hash ^= ZOBRIST_EP[self.en_passant_target & 7]
+        self._clear_square(end)
+        self._clear_square(start)
+        self._place_piece(end, piece if not promotion else promotion)
+        
+        # Update castling availability: moving a king or rook, or capturing
+        # a rook on its corner, gives up the matching rights
+        kind = abs(piece)
+        if kind == WK:
+            self.king_sq['white' if piece > 0 else 'black'] = end
+        castle = self.castle & CASTLE_RIGHTS[start] & CASTLE_RIGHTS[end]
+        if castle != self.castle:
+            self.zobrist_hash ^= ZOBRIST_CASTLE[self.castle] ^ ZOBRIST_CASTLE[castle]
+            self.castle = castle
 
         # Handle castling
-        if piece.lower() == 'k' and abs(start[1] - end[1]) == 2:
-            if end[1] > start[1]:  # Kingside
-                self.board[start[0]][5] = self.board[start[0]][7]  # Move rook from h to f
-                self.board[start[0]][7] = '.'
+        if kind == WK and abs(start - end) == 2:
+            if end > start:  # Kingside
+                rook = self.board[start + 3]
+                if rook != EMPTY:  # Move rook from h to f
+                    self._clear_square(start + 3)
+                    self._place_piece(start + 1, rook)
             else:  # Queenside
-                self.board[start[0]][3] = self.board[start[0]][0]  # Move rook from a to d
-                self.board[start[0]][0] = '.'
+                rook = self.board[start - 4]
+                if rook != EMPTY:  # Move rook from a to d
+                    self._clear_square(start - 4)
+                    self._place_piece(start - 1, rook)
 
         # Handle en passant
-        if piece.lower() == 'p':
-            if self.en_passant_target and end == self.en_passant_target:
-                capture_row = end[0] + (1 if self.current_player == 'white' else -1)
-                self.board[capture_row][end[1]] = '.'
+        if kind == WP:
+            if self.en_passant_target and end == self.en_passant_target and (start ^ end) & 7:
+                self._clear_square(end + (8 if self.current_player == 'white' else -8))
             # Set en passant target for two-square pawn moves
-            if abs(start[0] - end[0]) == 2:
-                self.en_passant_target = (
-                    start[0] + (1 if self.current_player == 'black' else -1),
-                    start[1]
-                )
+            if abs(start - end) == 16:
+                self.en_passant_target = (start + end) // 2
             else:
                 self.en_passant_target = None
         else:
             self.en_passant_target = None
+        if self.en_passant_target:
+            self.zobrist_hash ^= ZOBRIST_EP[self.en_passant_target & 7]
 
         # Update move counters
-        if piece.lower() == 'p' or self.get_piece(end) != '.':
+        if kind == WP or captured != EMPTY:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
@@ -93,402 +572,646 @@ class ChessBoard:
         if self.current_player == 'black':
             self.fullmove_number += 1
 
-    def get_legal_moves(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    def make_move(self, move: int):
+        """Play a packed move, recording what unmake_move needs, and pass the turn"""
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        piece = self.board[start]
+        captured_sq = end
+        if abs(piece) == WP and end == self.en_passant_target and (start ^ end) & 7:
+            captured_sq = end + (8 if piece > 0 else -8)
+        self.undo_stack.append((
+            start, end, piece, self.board[captured_sq], captured_sq,
+            self.en_passant_target, self.castle,
+            self.halfmove_clock, self.fullmove_number, self.zobrist_hash
+        ))
+        if promotion and piece < 0:
+            promotion = -promotion
+        self.move_piece(start, end, promotion)
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
+        self.zobrist_hash ^= ZOBRIST_SIDE
+
+    def unmake_move(self):
+        """Take back the last move played with make_move"""
+        (start, end, piece, captured, captured_sq, en_passant_target,
+         castle, halfmove_clock, fullmove_number, zobrist_hash) = self.undo_stack.pop()
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
+        self._clear_square(end)
+        self._place_piece(start, piece)
+        if captured != EMPTY:
+            self._place_piece(captured_sq, captured)
+        if abs(piece) == WK:
+            self.king_sq['white' if piece > 0 else 'black'] = start
+        
+        # Put a castling rook back in its corner
+        if abs(piece) == WK and abs(start - end) == 2:
+            rook_from, rook_to = (start + 1, start + 3) if end > start else (start - 1, start - 4)
+            rook = self.board[rook_from]
+            if rook != EMPTY:
+                self._clear_square(rook_from)
+                self._place_piece(rook_to, rook)
+        
+        self.en_passant_target = en_passant_target
+        self.castle = castle
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.zobrist_hash = zobrist_hash
+
+    def is_capture(self, move: int) -> bool:
+        """Whether a move takes a piece, en passant included"""
+        start, end = move & 63, move >> 6 & 63
+        if self.board[end] != EMPTY:
+            return True
+        return abs(self.board[start]) == WP and end == self.en_passant_target and bool((start ^ end) & 7)
+
+    def get_legal_moves(self) -> List[int]:
         """Get all legal moves for current player"""
+        if self._legal_cache[0] == self.zobrist_hash:
+            return self._legal_cache[1]
         moves = []
-        for i in range(8):
-            for j in range(8):
-                piece = self.board[i][j]
-                if piece != '.' and (
-                    (piece.isupper() and self.current_player == 'white') or 
-                    (piece.islower() and self.current_player == 'black')
-                ):
-                    moves.extend(self.get_legal_moves_for_piece((i, j)))
+        player = self.current_player
+        is_white = player == 'white'
+        board = self.board
+        en_passant = self.en_passant_target
+        king_sq = self.king_sq[player]
+        pinned, _, check_mask = self.compute_pinned_and_checkers(player)
+        pieces = self.occ_white if is_white else self.occ_black
+        
+        # Free pawns are generated together with shifts; en passant needs
+        # the full test, so it keeps every pawn on the per-piece path
+        if not en_passant:
+            pawns = self.bb[PIECE_IDX['P' if is_white else 'p']] & ~pinned
+            moves.extend(self.get_bulk_pawn_moves(pawns, is_white, check_mask))
+            pieces ^= pawns
+        
+        append = moves.append
+        while pieces:
+            sq = (pieces & -pieces).bit_length() - 1
+            if sq == king_sq or pinned >> sq & 1 or (en_passant and abs(board[sq]) == WP):
+                # King moves, pinned pieces and en passant need the full test
+                moves.extend(self.get_legal_moves_for_piece(sq))
+            else:
+                # Any other move is legal if it resolves a check in progress
+                for move in self.get_pseudo_legal_moves(sq):
+                    if check_mask >> (move >> 6 & 63) & 1:
+                        append(move)
+            pieces &= pieces - 1
+        self._legal_cache = (self.zobrist_hash, moves)
         return moves
 
-    def get_legal_moves_for_piece(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    def get_legal_moves_for_piece(self, sq: int) -> List[int]:
         """Get legal moves for a specific piece"""
-        piece = self.get_piece(pos).lower()
-        moves = []
-        
-        if piece == 'p':
-            moves.extend(self.get_pawn_moves(pos))
-        elif piece == 'n':
-            moves.extend(self.get_knight_moves(pos))
-        elif piece == 'b':
-            moves.extend(self.get_bishop_moves(pos))
-        elif piece == 'r':
-            moves.extend(self.get_rook_moves(pos))
-        elif piece == 'q':
-            moves.extend(self.get_bishop_moves(pos))
-            moves.extend(self.get_rook_moves(pos))
-        elif piece == 'k':
-            moves.extend(self.get_king_moves(pos))
-        
-        # Filter out moves that would leave own king in check
+        return self._legal_only(self.get_pseudo_legal_moves(sq))
+
+    def _legal_only(self, moves: List[int]) -> List[int]:
+        """Filter out moves that would leave own king in check"""
         legal_moves = []
+        player = self.current_player
+        make_move, unmake_move, is_in_check = self.make_move, self.unmake_move, self.is_in_check
         for move in moves:
-            temp_board = copy.deepcopy(self)
-            temp_board.move_piece(move[0], move[1])
-            if not temp_board.is_in_check(self.current_player):
+            make_move(move)
+            if not is_in_check(player):
                 legal_moves.append(move)
+            unmake_move()
                 
         return legal_moves
 
-    def get_pawn_moves(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Get legal pawn moves, including captures and two-square advances"""
+    def get_capture_moves(self) -> List[int]:
+        """Get legal captures for current player, en passant included"""
         moves = []
-        row, col = pos
-        direction = -1 if self.current_player == 'white' else 1
-        start_row = 6 if self.current_player == 'white' else 1
-        
-        # One square forward
-        if 0 <= row + direction < 8 and self.board[row + direction][col] == '.':
-            moves.append((pos, (row + direction, col)))
-            # Two squares forward from starting position
-            if row == start_row and self.board[row + 2 * direction][col] == '.' and self.board[row + direction][col] == '.':
-                moves.append((pos, (row + 2 * direction, col)))
+        player = self.current_player
+        is_white = player == 'white'
+        board = self.board
+        occ_all = self.occ_all
+        en_passant = self.en_passant_target
+        king_sq = self.king_sq[player]
+        pinned, _, check_mask = self.compute_pinned_and_checkers(player)
+        pieces = self.occ_white if is_white else self.occ_black
+        enemy = self.occ_black if is_white else self.occ_white
         
-        # Captures
-        for dc in [-1, 1]:
-            new_col = col + dc
-            if 0 <= new_col < 8 and 0 <= row + direction < 8:
-                target = self.board[row + direction][new_col]
-                if target != '.' and (
-                    target.isupper() != self.get_piece(pos).isupper()
-                ):
-                    moves.append((pos, (row + direction, new_col)))
-                elif self.en_passant_target and (
-                    row + direction, new_col
-                ) == self.en_passant_target:
-                    moves.append((pos, (row + direction, new_col)))
+        if not en_passant:
+            pawns = self.bb[PIECE_IDX['P' if is_white else 'p']] & ~pinned
+            moves.extend(self.get_bulk_pawn_moves(pawns, is_white, check_mask & enemy))
+            pieces ^= pawns
+        pawn_targets = self._pawn_capture_targets(is_white)
         
+        while pieces:
+            sq = (pieces & -pieces).bit_length() - 1
+            kind = abs(board[sq])
+            if kind == WP:
+                # Pinned pawns and en passant need the full test
+                moves.extend(self._legal_only(self.get_bulk_pawn_moves(1 << sq, is_white, pawn_targets)))
+                pieces &= pieces - 1
+                continue
+            if kind == WN:
+                targets = KNIGHT_ATTACKS[sq] & enemy
+            elif kind == WB:
+                targets = bishop_attacks(sq, occ_all) & enemy
+            elif kind == WR:
+                targets = rook_attacks(sq, occ_all) & enemy
+            elif kind == WQ:
+                targets = (bishop_attacks(sq, occ_all) | rook_attacks(sq, occ_all)) & enemy
+            else:
+                targets = KING_ATTACKS[sq] & enemy
+            if sq == king_sq or pinned >> sq & 1:
+                moves.extend(self._legal_only(self._moves_to_targets(sq, targets)))
+            else:
+                moves.extend(self._moves_to_targets(sq, targets & check_mask))
+            pieces &= pieces - 1
         return moves
 
-    def get_knight_moves(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Get legal knight moves"""
+    def get_pseudo_legal_moves(self, sq: int) -> List[int]:
+        """Get moves for a specific piece without checking king safety"""
+        kind = abs(self.board[sq])
         moves = []
-        row, col = pos
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        
-        for dr, dc in knight_moves:
-            new_row, new_col = row + dr, col + dc
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                target = self.board[new_row][new_col]
-                if target == '.' or target.isupper() != self.get_piece(pos).isupper():
-                    moves.append((pos, (new_row, new_col)))
         
+        if kind == WP:
+            moves.extend(self.get_pawn_moves(sq))
+        elif kind == WN:
+            moves.extend(self.get_knight_moves(sq))
+        elif kind == WB:
+            moves.extend(self.get_bishop_moves(sq))
+        elif kind == WR:
+            moves.extend(self.get_rook_moves(sq))
+        elif kind == WQ:
+            moves.extend(self.get_bishop_moves(sq))
+            moves.extend(self.get_rook_moves(sq))
+        elif kind == WK:
+            moves.extend(self.get_king_moves(sq))
         return moves
 
-    def get_bishop_moves(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Get legal bishop moves"""
+    def _own_occupancy(self, sq: int) -> int:
+        """Occupancy bitboard of the side owning the piece on sq"""
+        return self.occ_white if self.board[sq] > 0 else self.occ_black
+
+    def _moves_to_targets(self, start: int, targets: int) -> List[int]:
+        """Expand a bitboard of destination squares into packed moves"""
         moves = []
-        row, col = pos
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                target = self.board[r][c]
-                moves.append((pos, (r, c)))
-                if target != '.':
-                    if target.isupper() != self.get_piece(pos).isupper():
-                        break
-                    else:
-                        moves.pop()  # Remove move to own piece's square
-                        break
-                r += dr
-                c += dc
-        
+        append = moves.append
+        while targets:
+            sq = (targets & -targets).bit_length() - 1
+            append(start | sq << 6)
+            targets &= targets - 1
         return moves
 
-    def get_rook_moves(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Get legal rook moves"""
+    def get_pawn_moves(self, sq: int) -> List[int]:
+        """Get legal pawn moves, including captures, two-square advances and promotions"""
+        return self.get_bulk_pawn_moves(1 << sq, self.board[sq] > 0)
+
+    def _pawn_capture_targets(self, is_white: bool) -> int:
+        """Squares a pawn of the given color may capture on, en passant included"""
+        targets = self.occ_black if is_white else self.occ_white
+        if self.en_passant_target:
+            targets |= 1 << self.en_passant_target
+        return targets
+
+    def get_bulk_pawn_moves(self, pawns: int, is_white: bool, mask: int = MASK64) -> List[int]:
+        """Get pseudo-legal moves of a whole set of pawns with shifts, keeping
+        only destinations inside mask"""
         moves = []
-        row, col = pos
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                target = self.board[r][c]
-                moves.append((pos, (r, c)))
-                if target != '.':
-                    if target.isupper() != self.get_piece(pos).isupper():
-                        break
-                    else:
-                        moves.pop()  # Remove move to own piece's square
-                        break
-                r += dr
-                c += dc
-        
+        empty = MASK64 ^ self.occ_all
+        captures = self._pawn_capture_targets(is_white)
+        if is_white:
+            single = pawns >> 8 & empty
+            double = (single & RANK_3) >> 8 & empty
+            left = (pawns & ~FILE_A) >> 9 & captures
+            right = (pawns & ~FILE_H) >> 7 & captures
+            steps = ((single, 8), (double, 16), (left, 9), (right, 7))
+        else:
+            single = pawns << 8 & empty
+            double = (single & RANK_6) << 8 & empty
+            left = (pawns & ~FILE_A) << 7 & captures
+            right = (pawns & ~FILE_H) << 9 & captures
+            steps = ((single, -8), (double, -16), (left, -7), (right, -9))
+        append = moves.append
+        for targets, back in steps:
+            targets &= mask
+            while targets:
+                sq = (targets & -targets).bit_length() - 1
+                move = sq + back | sq << 6
+                if PROMOTION_RANKS >> sq & 1:
+                    moves.extend(move | kind << 12 for kind in PROMOTION_KINDS)
+                else:
+                    append(move)
+                targets &= targets - 1
         return moves
 
-    def get_king_moves(self, pos: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    def get_knight_moves(self, sq: int) -> List[int]:
+        """Get legal knight moves"""
+        return self._moves_to_targets(sq, KNIGHT_ATTACKS[sq] & ~self._own_occupancy(sq))
+
+    def get_bishop_moves(self, sq: int) -> List[int]:
+        """Get legal bishop moves"""
+        return self._moves_to_targets(sq, bishop_attacks(sq, self.occ_all) & ~self._own_occupancy(sq))
+
+    def get_rook_moves(self, sq: int) -> List[int]:
+        """Get legal rook moves"""
+        return self._moves_to_targets(sq, rook_attacks(sq, self.occ_all) & ~self._own_occupancy(sq))
+
+    def get_king_moves(self, sq: int) -> List[int]:
         """Get legal king moves including castling"""
-        moves = []
-        row, col = pos
-        directions = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1), (0, 1),
-            (1, -1), (1, 0), (1, 1)
-        ]
-        
         # Normal king moves
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                target = self.board[new_row][new_col]
-                if target == '.' or target.isupper() != self.get_piece(pos).isupper():
-                    moves.append((pos, (new_row, new_col)))
+        moves = self._moves_to_targets(sq, KING_ATTACKS[sq] & ~self._own_occupancy(sq))
         
         # Castling
-        if self.castling_availability[f'{self.current_player}_king'] and not self.is_in_check(self.current_player):
+        player = self.current_player
+        rights = self.castle & (WK_MASK | WQ_MASK if player == 'white' else BK_MASK | BQ_MASK)
+        if rights and not self.is_in_check(player):
             # Kingside
             if (
-                self.board[row][col + 1] == '.' and
-                self.board[row][col + 2] == '.' and
-                not self.is_square_attacked((row, col + 1), self.current_player) and
-                not self.is_square_attacked((row, col + 2), self.current_player)
+                rights & (WK_MASK | BK_MASK) and
+                not self.occ_all & (0b11 << (sq + 1)) and
+                not self.is_square_attacked(sq + 1, player) and
+                not self.is_square_attacked(sq + 2, player)
             ):
-                moves.append((pos, (row, col + 2)))
+                moves.append(sq | (sq + 2) << 6)
             # Queenside
             if (
-                self.board[row][col - 1] == '.' and
-                self.board[row][col - 2] == '.' and
-                self.board[row][col - 3] == '.' and
-                not self.is_square_attacked((row, col - 1), self.current_player) and
-                not self.is_square_attacked((row, col - 2), self.current_player)
+                rights & (WQ_MASK | BQ_MASK) and
+                not self.occ_all & (0b111 << (sq - 3)) and
+                not self.is_square_attacked(sq - 1, player) and
+                not self.is_square_attacked(sq - 2, player)
             ):
-                moves.append((pos, (row, col - 2)))
+                moves.append(sq | (sq - 2) << 6)
         
         return moves
 
     def is_in_check(self, player: str) -> bool:
         """Check if player's king is in check"""
-        king_pos = None
-        for i in range(8):
-            for j in range(8):
-                if self.board[i][j].lower() == 'k' and (
-                    (player == 'white' and self.board[i][j].isupper()) or
-                    (player == 'black' and self.board[i][j].islower())
-                ):
-                    king_pos = (i, j)
-                    break
-            if king_pos:
-                break
-        
-        if not king_pos:
-            return False
-        return self.is_square_attacked(king_pos, player)
+        return self.is_square_attacked(self.king_sq[player], player)
 
-    def is_square_attacked(self, pos: Tuple[int, int], player: str) -> bool:
+    def is_square_attacked(self, sq: int, player: str) -> bool:
         """Check if a square is attacked by opponent's pieces"""
-        row, col = pos
         opponent = 'black' if player == 'white' else 'white'
+        offset = 0 if opponent == 'white' else 6
+        bb = self.bb
         
         # Check knight attacks
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        for dr, dc in knight_moves:
-            r, c = row + dr, col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece.lower() == 'n' and (
-                    (opponent == 'white' and piece.isupper()) or
-                    (opponent == 'black' and piece.islower())
-                ):
-                    return True
+        if KNIGHT_ATTACKS[sq] & bb[offset + PIECE_IDX['N']]:
+            return True
 
         # Check diagonal attacks (bishop/queen)
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece != '.':
-                    if (
-                        piece.lower() in ('b', 'q') and
-                        ((opponent == 'white' and piece.isupper()) or
-                         (opponent == 'black' and piece.islower()))
-                    ):
-                        return True
-                    break
-                r += dr
-                c += dc
+        diagonal = bb[offset + PIECE_IDX['B']] | bb[offset + PIECE_IDX['Q']]
+        if bishop_attacks(sq, self.occ_all) & diagonal:
+            return True
 
         # Check rank/file attacks (rook/queen)
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece != '.':
-                    if (
-                        piece.lower() in ('r', 'q') and
-                        ((opponent == 'white' and piece.isupper()) or
-                         (opponent == 'black' and piece.islower()))
-                    ):
-                        return True
-                    break
-                r += dr
-                c += dc
+        straight = bb[offset + PIECE_IDX['R']] | bb[offset + PIECE_IDX['Q']]
+        if rook_attacks(sq, self.occ_all) & straight:
+            return True
 
         # Check pawn attacks
-        pawn_dir = 1 if opponent == 'white' else -1
-        for dc in [-1, 1]:
-            r, c = row + pawn_dir, col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece.lower() == 'p' and (
-                    (opponent == 'white' and piece.isupper()) or
-                    (opponent == 'black' and piece.islower())
-                ):
-                    return True
+        if PAWN_ATTACKS[WHITE if player == 'white' else BLACK][sq] & bb[offset + PIECE_IDX['P']]:
+            return True
 
         # Check king attacks
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                r, c = row + dr, col + dc
-                if 0 <= r < 8 and 0 <= c < 8:
-                    piece = self.board[r][c]
-                    if piece.lower() == 'k' and (
-                        (opponent == 'white' and piece.isupper()) or
-                        (opponent == 'black' and piece.islower())
-                    ):
-                        return True
+        if KING_ATTACKS[sq] & bb[offset + PIECE_IDX['K']]:
+            return True
 
         return False
 
+    def attackers_to(self, sq: int, player: str) -> int:
+        """Bitboard of the opponent's pieces attacking a square"""
+        offset = 0 if player == 'black' else 6
+        bb = self.bb
+        
+        queens = bb[offset + PIECE_IDX['Q']]
+        return (
+            KNIGHT_ATTACKS[sq] & bb[offset + PIECE_IDX['N']] |
+            KING_ATTACKS[sq] & bb[offset + PIECE_IDX['K']] |
+            PAWN_ATTACKS[WHITE if player == 'white' else BLACK][sq] & bb[offset + PIECE_IDX['P']] |
+            bishop_attacks(sq, self.occ_all) & (bb[offset + PIECE_IDX['B']] | queens) |
+            rook_attacks(sq, self.occ_all) & (bb[offset + PIECE_IDX['R']] | queens)
+        )
+
+    def compute_pinned_and_checkers(self, player: str) -> Tuple[int, int, int]:
+        """Find pieces pinned to player's king, the pieces giving check, and
+        the squares a non-king move must land on to resolve the check"""
+        king_sq = self.king_sq[player]
+        own = self.occ_white if player == 'white' else self.occ_black
+        offset = 0 if player == 'black' else 6
+        bb = self.bb
+        queens = bb[offset + PIECE_IDX['Q']]
+        straight = bb[offset + PIECE_IDX['R']] | queens
+        diagonal = bb[offset + PIECE_IDX['B']] | queens
+        occ_all = self.occ_all
+        king_rays = RAY[king_sq]
+        
+        pinned = 0
+        for direction in range(8):
+            sliders = straight if direction in ROOK_DIRECTIONS else diagonal
+            if not king_rays[direction] & sliders:
+                continue
+            # An own piece is pinned when the next blocker behind it is an enemy slider
+            blockers = ray_attacks(king_sq, direction, occ_all) & occ_all
+            if blockers & own:
+                behind = ray_attacks(blockers.bit_length() - 1, direction, occ_all) & occ_all
+                if behind & sliders:
+                    pinned |= blockers
+        
+        checkers = self.attackers_to(king_sq, player)
+        if not checkers:
+            check_mask = MASK64
+        elif checkers & (checkers - 1):
+            check_mask = 0  # Double check: only the king may move
+        else:
+            checker_sq = checkers.bit_length() - 1
+            check_mask = checkers
+            for direction in range(8):
+                if king_rays[direction] & checkers:
+                    check_mask |= king_rays[direction] & ~RAY[checker_sq][direction] & ~checkers
+                    break
+        return pinned, checkers, check_mask
+
     def is_checkmate(self) -> bool:
         """Check if current position is checkmate"""
-        if not self.is_in_check(self.current_player):
-            return False
-        return len(self.get_legal_moves()) == 0
+        return self.is_in_check(self.current_player) and not self.get_legal_moves()
 
     def is_stalemate(self) -> bool:
         """Check if current position is stalemate"""
-        if self.is_in_check(self.current_player):
-            return False
-        return len(self.get_legal_moves()) == 0
+        return not self.is_in_check(self.current_player) and not self.get_legal_moves()
 
 class ChessAI:
-    def __init__(self, depth: int = 3):
+    def __init__(self, depth: int = 3, workers: Optional[int] = 1, time_limit: Optional[float] = None):
         self.depth = depth
+        # Seconds after which no deeper iteration is started; None searches to full depth
+        self.time_limit = time_limit
+        # Root moves are searched in this many processes (None: one per core);
+        # 1 keeps search in-process, which is faster except for deep searches
+        self.workers = cpu_count() if workers is None else workers
+        self._pool = None
+        # Piece values for capture ordering; evaluation uses MG_PST/EG_PST
         self.piece_values = {'p': 1, 'n': 3, 'b': 3, 'r': 5, 'q': 9, 'k': 100}
-        # Positional bonuses
-        self.center_squares = [(3, 3), (3, 4), (4, 3), (4, 4)]
-        self.pawn_structure_bonus = 0.5
-        self.mobility_bonus = 0.1
+        self.kind_values = [0] + [self.piece_values[p] for p in 'pnbrqk']
+        # Transposition table: zobrist hash -> (depth, score, flag, best move)
+        self.tt = {}
+        self.tt_size = 1 << 20
+        # Up to two quiet moves per ply that caused a beta cutoff
+        self.killers = {}
 
     def evaluate_position(self, board: ChessBoard) -> float:
-        """Evaluate board position with material and positional factors"""
-        score = 0
-        
-        # Material evaluation
-        for i in range(8):
-            for j in range(8):
-                piece = board.board[i][j]
-                if piece != '.':
-                    value = self.piece_values[piece.lower()]
-                    if piece.isupper():
-                        score += value
-                    else:
-                        score -= value
-                    # Center control bonus
-                    if (i, j) in self.center_squares and piece.lower() in ('p', 'n', 'b'):
-                        score += 0.5 if piece.isupper() else -0.5
-                    # Mobility bonus
-                    if piece.lower() != 'k':
-                        moves = len(board.get_legal_moves_for_piece((i, j)))
-                        score += moves * self.mobility_bonus if piece.isupper() else -moves * self.mobility_bonus
-        
-        # Pawn structure bonus
-        for col in range(8):
-            white_pawns = sum(1 for row in range(8) if board.board[row][col] == 'P')
-            black_pawns = sum(1 for row in range(8) if board.board[row][col] == 'p')
-            if white_pawns > 1:
-                score += self.pawn_structure_bonus
-            if black_pawns > 1:
-                score -= self.pawn_structure_bonus
-                
-        # King safety penalty
-        for player in ['white', 'black']:
-            king_pos = None
-            for i in range(8):
-                for j in range(8):
-                    if board.board[i][j].lower() == 'k' and (
-                        (player == 'white' and board.board[i][j].isupper()) or
-                        (player == 'black' and board.board[i][j].islower())
-                    ):
-                        king_pos = (i, j)
-                        break
-                if king_pos:
-                    break
-            if king_pos:
-                attackers = sum(1 for r in range(8) for c in range(8) 
-                              if board.board[r][c] != '.' and 
-                              board.board[r][c].isupper() != (player == 'white') and
-                              board.is_square_attacked(king_pos, player))
-                score += -attackers * 0.5 if player == 'white' else attackers * 0.5
-                
+        """Evaluate board position in pawns, blending the middlegame and
+        endgame piece-square scores by the remaining material"""
+        # Early promotions can push the phase past the starting total
+        phase = min(board.phase, TOTAL_PHASE)
+        score = board.mg_score * phase + board.eg_score * (TOTAL_PHASE - phase)
+        return score / (TOTAL_PHASE * 100)
+
+    def score_move(self, board: ChessBoard, move: int, ply: int) -> int:
+        """Ordering key for a move: MVV-LVA captures, then killers, then quiet moves"""
+        start, end = move & 63, move >> 6 & 63
+        attacker = abs(board.board[start])
+        victim = abs(board.board[end])
+        if not victim and attacker == WP and (start ^ end) & 7:
+            victim = WP  # En passant
+        if victim:
+            return CAPTURE_SCORE + 100 * self.kind_values[victim] - self.kind_values[attacker]
+        if move in self.killers.get(ply, ()):
+            return KILLER_SCORE
+        return 0
+
+    def _store_killer(self, move: int, ply: int):
+        """Remember a quiet move that caused a beta cutoff at this ply"""
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    def quiescence(self, board: ChessBoard, alpha: float, beta: float, maximizing: bool, ply: int) -> float:
+        """Search captures only, so leaves are never scored in the middle
+        of an exchange. A side in check may not stand pat and searches all
+        of its evasions instead."""
+        in_check = board.is_in_check(board.current_player) and ply < MAX_PLY
+        if in_check:
+            moves = board.get_legal_moves()
+            if not moves:
+                return self.mate_score(board, ply)
+            best_score = -math.inf if maximizing else math.inf
+        else:
+            stand_pat = self.evaluate_position(board)
+            if maximizing:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best_score = stand_pat
+            moves = board.get_capture_moves()
+
+        moves = sorted(moves, key=lambda move: self.score_move(board, move, ply), reverse=True)
+        for move in moves:
+            board.make_move(move)
+            eval_score = self.quiescence(board, alpha, beta, not maximizing, ply + 1)
+            board.unmake_move()
+            if maximizing:
+                best_score = max(best_score, eval_score)
+                alpha = max(alpha, eval_score)
+            else:
+                best_score = min(best_score, eval_score)
+                beta = min(beta, eval_score)
+            if beta <= alpha:
+                break
+        return best_score
+
+    @staticmethod
+    def mate_score(board: ChessBoard, ply: int) -> float:
+        """Score of the side to move being checkmated ply plies from the root"""
+        return -(MATE_SCORE - ply) if board.current_player == 'white' else MATE_SCORE - ply
+
+    @staticmethod
+    def _score_to_tt(score: float, ply: int) -> float:
+        """Store mate scores as distance from this node, not from the root"""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score: float, ply: int) -> float:
+        """Undo _score_to_tt for a node ply plies from the root"""
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
         return score
 
-    def minimax(self, board: ChessBoard, depth: int, alpha: float, beta: float, maximizing: bool) -> Tuple[float, Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    def minimax(self, board: ChessBoard, depth: int, alpha: float, beta: float, maximizing: bool, ply: int = 0) -> Tuple[float, Optional[int]]:
         """Min-Max algorithm with Alpha-Beta pruning"""
-        if depth == 0 or board.is_checkmate() or board.is_stalemate():
-            return self.evaluate_position(board), None
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        entry = self.tt.get(board.zobrist_hash)
+        if entry:
+            entry_depth, entry_score, flag, tt_move = entry
+            entry_score = self._score_from_tt(entry_score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    return entry_score, tt_move
+
+        if depth == 0:
+            return self.quiescence(board, alpha, beta, maximizing, ply), None
+
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            # Checkmate or stalemate; cheap to redetect, so not stored
+            if board.is_in_check(board.current_player):
+                return self.mate_score(board, ply), None
+            return 0.0, None
+
+        moves = sorted(legal_moves, key=lambda move: self.score_move(board, move, ply), reverse=True)
+        # Search the previously best move first for earlier cutoffs
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
 
         if maximizing:
             max_eval = -math.inf
             best_move = None
-            for move in board.get_legal_moves():
-                temp_board = copy.deepcopy(board)
-                temp_board.move_piece(move[0], move[1])
-                temp_board.current_player = 'black' if temp_board.current_player == 'white' else 'white'
-                eval_score, _ = self.minimax(temp_board, depth - 1, alpha, beta, False)
+            for move in moves:
+                board.make_move(move)
+                eval_score, _ = self.minimax(board, depth - 1, alpha, beta, False, ply + 1)
+                board.unmake_move()
                 if eval_score > max_eval:
                     max_eval = eval_score
                     best_move = move
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    if not board.is_capture(move):
+                        self._store_killer(move, ply)
                     break
-            return max_eval, best_move
+            best_score = max_eval
         else:
             min_eval = math.inf
             best_move = None
-            for move in board.get_legal_moves():
-                temp_board = copy.deepcopy(board)
-                temp_board.move_piece(move[0], move[1])
-                temp_board.current_player = 'black' if temp_board.current_player == 'white' else 'white'
-                eval_score, _ = self.minimax(temp_board, depth - 1, alpha, beta, True)
+            for move in moves:
+                board.make_move(move)
+                eval_score, _ = self.minimax(board, depth - 1, alpha, beta, True, ply + 1)
+                board.unmake_move()
                 if eval_score < min_eval:
                     min_eval = eval_score
                     best_move = move
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    if not board.is_capture(move):
+                        self._store_killer(move, ply)
                     break
-            return min_eval, best_move
+            best_score = min_eval
 
-    def get_best_move(self, board: ChessBoard) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        """Get AI's best move"""
-        _, move = self.minimax(board, self.depth, -math.inf, math.inf, board.current_player == 'white')
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[board.zobrist_hash] = (depth, self._score_to_tt(best_score, ply), flag, best_move)
+        return best_score, best_move
+
+    def get_best_move(self, board: ChessBoard) -> int:
+        """Get AI's best move, deepening one ply at a time so every
+        iteration is ordered by the TT moves of the one before"""
+        moves = board.get_legal_moves()
+        if self.workers > 1 and self.depth > 1 and len(moves) > 1:
+            return self._get_best_move_parallel(board, moves)
+        if len(self.tt) > self.tt_size:
+            self.tt.clear()
+        self.killers = {}
+        maximizing = board.current_player == 'white'
+        started = time.time()
+        move = None
+        for depth in range(1, self.depth + 1):
+            _, move = self.minimax(board, depth, -math.inf, math.inf, maximizing)
+            if self._out_of_time(started):
+                break
         return move
 
-def pos_to_notation(pos: Tuple[int, int]) -> str:
-    """Convert position to algebraic notation"""
-    return f"{chr(ord('a') + pos[1])}{8 - pos[0]}"
+    def _out_of_time(self, started: float) -> bool:
+        """Whether the time budget of a search begun at started is spent"""
+        return self.time_limit is not None and time.time() - started >= self.time_limit
+
+    def _get_best_move_parallel(self, board: ChessBoard, moves: List[int]) -> int:
+        """Young-brothers-wait root split: search the first root move here,
+        then the rest in worker processes with its score as the bound to
+        beat. Workers get the position after the move as FEN and keep their
+        own transposition tables."""
+        if len(self.tt) > self.tt_size:
+            self.tt.clear()
+        if self._pool is None:
+            self._pool = Pool(self.workers, _init_search_worker, (self.depth,))
+        maximizing = board.current_player == 'white'
+        self.killers = {}
+        moves = sorted(moves, key=lambda move: self.score_move(board, move, 0), reverse=True)
+        fens = []
+        for move in moves:
+            board.make_move(move)
+            fens.append(board.to_fen())
+            board.unmake_move()
+        
+        # Deepen one ply per round. The previous round's best move goes
+        # first: it is searched here, where this engine's TT carries over
+        # between rounds, and a good first score gives the workers a tight
+        # bound. Worker TTs are not tied to a subtree, so they help little.
+        started = time.time()
+        for depth in range(1, self.depth + 1):
+            board.make_move(moves[0])
+            first_score, _ = self.minimax(board, depth - 1, -math.inf, math.inf, not maximizing, 1)
+            board.unmake_move()
+            # A brother that cannot beat the first move fails against the bound
+            alpha, beta = (first_score, math.inf) if maximizing else (-math.inf, first_score)
+            tasks = [(fen, depth - 1, not maximizing, alpha, beta) for fen in fens[1:]]
+            scores = [first_score] + self._pool.map(_search_subtree, tasks, chunksize=1)
+            # Only the best score is exact; the others are bounds, so the
+            # rest keep their order
+            pick = max if maximizing else min
+            best = pick(range(len(moves)), key=scores.__getitem__)
+            moves.insert(0, moves.pop(best))
+            fens.insert(0, fens.pop(best))
+            if self._out_of_time(started):
+                break
+        return moves[0]
+
+    def close(self):
+        """Shut down the worker processes of the parallel search, if started"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+# Per-process engine of the root-parallel search, set up by _init_search_worker
+_worker_ai = None
+
+def _init_search_worker(depth: int):
+    """Pool initializer: give the worker process its own single-process engine"""
+    global _worker_ai
+    _worker_ai = ChessAI(depth, workers=1)
 
-def notation_to_pos(notation: str) -> Tuple[int, int]:
-    """Convert algebraic notation to position"""
+def _search_subtree(task: Tuple[str, int, bool, float, float]) -> float:
+    """Score the position after a root move to the given depth within the
+    (alpha, beta) window"""
+    fen, depth, maximizing, alpha, beta = task
+    if len(_worker_ai.tt) > _worker_ai.tt_size:
+        _worker_ai.tt.clear()
+    _worker_ai.killers = {}
+    score, _ = _worker_ai.minimax(ChessBoard.from_fen(fen), depth, alpha, beta, maximizing, 1)
+    return score
+
+def pos_to_notation(sq: int) -> str:
+    """Convert a square index to algebraic notation"""
+    return f"{chr(ord('a') + sq % 8)}{8 - sq // 8}"
+
+def notation_to_pos(notation: str) -> int:
+    """Convert algebraic notation to a square index"""
     col = ord(notation[0].lower()) - ord('a')
     row = 8 - int(notation[1])
-    return (row, col)
+    if not (0 <= col < 8 and 0 <= row < 8):
+        raise ValueError(f"Square out of range: {notation}")
+    return row * 8 + col
 
 def main():
     """Main game loop"""
@@ -520,29 +1243,26 @@ def main():
                         end = notation_to_pos(move[2:])
                         # Validate piece belongs to current player
                         piece = board.get_piece(start)
-                        if piece == '.' or (piece.isupper() != (board.current_player == 'white')):
+                        if piece == EMPTY or ((piece > 0) != (board.current_player == 'white')):
                             print("Invalid move: No valid piece at start position.")
                             continue
                         
-                        move_tuple = (start, end)
                         legal_moves = board.get_legal_moves()
-                        if move_tuple not in legal_moves:
+                        if not any(m & MOVE_SQUARES == pack_move(start, end) for m in legal_moves):
                             print("Illegal move. Try again.")
                             continue
                             
                         promotion = None
                         # Check for pawn promotion
-                        if (
-                            piece.lower() == 'p' and 
-                            ((end[0] == 0 and board.current_player == 'white') or 
-                             (end[0] == 7 and board.current_player == 'black'))
-                        ):
+                        if abs(piece) == WP and PROMOTION_RANKS >> end & 1:
                             promotion = input("Promote to (Q/R/B/N): ").upper()
                             if promotion not in ['Q', 'R', 'B', 'N']:
                                 print("Invalid promotion piece.")
                                 continue
+                            if board.current_player == 'black':
+                                promotion = promotion.lower()
                         
-                        board.move_piece(start, end, promotion)
+                        board.make_move(pack_move(start, end, abs(PIECE_CODE[promotion]) if promotion else 0))
                         board.move_history.append((move, promotion))
                         break
                     except (ValueError, IndexError):
@@ -552,25 +1272,19 @@ def main():
         else:
             # AI's move
             print("AI is thinking...")
-            start, end = ai.get_best_move(board)
-            move_notation = pos_to_notation(start) + pos_to_notation(end)
+            move = ai.get_best_move(board)
+            move_notation = pos_to_notation(move & 63) + pos_to_notation(move >> 6 & 63)
             promotion = None
             
-            # Handle AI pawn promotion (always promote to queen)
-            if (
-                board.get_piece(start).lower() == 'p' and 
-                ((end[0] == 0 and board.current_player == 'white') or 
-                 (end[0] == 7 and board.current_player == 'black'))
-            ):
-                promotion = 'q' if board.current_player == 'black' else 'Q'
+            # The search picks the promotion piece along with the move
+            if move >> 12:
+                promotion = PIECE_SYMBOLS[move >> 12 if board.current_player == 'white' else -(move >> 12)]
             
-            board.move_piece(start, end, promotion)
+            board.make_move(move)
             board.move_history.append((move_notation, promotion))
             print(f"AI moves: {move_notation}")
             if promotion:
                 print(f"Promoted to {'Queen' if promotion.lower() == 'q' else promotion}")
-        
-        board.current_player = 'black' if board.current_player == 'white' else 'white'
 
 if __name__ == "__main__":
     main()
\ No newline at end of file